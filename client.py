@@ -2,13 +2,16 @@
 
 import configparser
 import os
+import queue
 import time
 import socket
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Set
+from typing import Dict, Iterable, Optional, Set
 
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service
@@ -19,15 +22,49 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    from watchdog.observers import Observer
+except ImportError:  # Optional: without watchdog, downloads are detected by polling
+    Observer = None
+
 # Initialize logger
 log = logging.getLogger(__name__)
 
+DOWNLOAD_TIMEOUT_SEC = 60
+DEFAULT_DOWNLOAD_WORKERS = 4
+
 
 def get_downloads_folder() -> Path:
     """Returns the path to the user's Downloads folder as a Path object."""
     return Path.home() / "Downloads"
 
 
+def _list_names(directory: Path) -> Set[str]:
+    """Entry names from a single os.scandir pass, without building a Path per file."""
+    with os.scandir(directory) as entries:
+        return {e.name for e in entries}
+
+
+class _DownloadWatcher:
+    """
+    Watchdog event handler that queues the name of each completed download.
+    Chrome writes to a .crdownload file and renames it when finished, so both
+    'created' and 'moved' events are inspected for the final name.
+    """
+
+    def __init__(self, files_before: Set[str]):
+        self.files_before = files_before
+        self.finished: "queue.Queue[str]" = queue.Queue()
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in ('created', 'moved'):
+            return
+        final_path = getattr(event, 'dest_path', '') or event.src_path
+        name = os.path.basename(os.fsdecode(final_path))
+        if name not in self.files_before and not name.endswith(('.tmp', '.crdownload')):
+            self.finished.put(name)
+
+
 class MapMyRideClient:
     """
     A client to handle web interactions with MapMyRide by attaching to a
@@ -39,6 +76,10 @@ class MapMyRideClient:
         self.browser: Optional[webdriver.Chrome] = None
         self.temp_download_dir: Optional[Path] = None
         self._is_logged_in = False
+        # TCX files fetched ahead of time over HTTP, keyed by workout ID
+        self._prefetched: Dict[str, Path] = {}
+
+        self.download_workers = config.getint('selenium', 'download_workers', fallback=DEFAULT_DOWNLOAD_WORKERS)
 
         self.port = config.getint('selenium', 'remote_debugging_port', fallback=9222)
         self.chrome_path = config.get('selenium', 'chrome_path')
@@ -231,13 +272,31 @@ class MapMyRideClient:
         t_dir = self.temp_download_dir
         if not driver or not t_dir: return None
 
-        files_before = {p.name for p in t_dir.iterdir()}
-        driver.get(url)
+        files_before = _list_names(t_dir)
+        if Observer is None:
+            driver.get(url)
+            return self._poll_for_new_file(t_dir, files_before)
 
-        for _ in range(120):
+        # Event-driven wait: the observer must be running before the download starts
+        watcher = _DownloadWatcher(files_before)
+        observer = Observer()
+        observer.schedule(watcher, str(t_dir), recursive=False)
+        observer.start()
+        try:
+            driver.get(url)
+            return t_dir / watcher.finished.get(timeout=DOWNLOAD_TIMEOUT_SEC)
+        except queue.Empty:
+            return None
+        finally:
+            observer.stop()
+            observer.join()
+
+    @staticmethod
+    def _poll_for_new_file(t_dir: Path, files_before: Set[str]) -> Optional[Path]:
+        """Fallback used when watchdog is not installed."""
+        for _ in range(int(DOWNLOAD_TIMEOUT_SEC / 0.5)):
             time.sleep(0.5)
-            files_after = {p.name for p in t_dir.iterdir()}
-            new_files = files_after - files_before
+            new_files = _list_names(t_dir) - files_before
             if new_files:
                 new_file_name = new_files.pop()
                 if not new_file_name.endswith(('.tmp', '.crdownload')):
@@ -247,9 +306,120 @@ class MapMyRideClient:
     def download_workout_list_csv(self) -> Optional[Path]:
         if not self._ensure_login_and_browser(): return None
         csv_export_url = self._config.get('urls', 'csv_export_url')
+        # The browser is only needed for login; the export itself is a plain authenticated GET
+        csv_path = self._fetch_workout_list_csv(csv_export_url)
+        if csv_path:
+            return csv_path
+        log.info("Direct CSV download unavailable; downloading through the browser instead.")
         return self._download_file_and_wait(csv_export_url)
 
+    def _fetch_workout_list_csv(self, url: str) -> Optional[Path]:
+        """
+        Streams the workout list export straight to disk over HTTP. Returns None unless the response
+        looks like the export (a header line naming the 'Link' column), so the browser can try instead.
+        """
+        t_dir = self.temp_download_dir
+        session = self._build_http_session()
+        if not t_dir or session is None:
+            return None
+        dest = t_dir / f"workout_list_{int(time.time())}.csv"
+        try:
+            with session, session.get(url, timeout=DOWNLOAD_TIMEOUT_SEC, stream=True) as response:
+                if response.status_code != 200 or 'html' in response.headers.get('Content-Type', '').lower():
+                    return None
+                chunks = response.iter_content(chunk_size=1 << 16)
+                # An empty body or a JSON error also arrives as a 200; the export always starts with its header
+                first_chunk = next(chunks, b'')
+                if b'Link' not in first_chunk.split(b'\n', 1)[0]:
+                    log.debug(f"Direct CSV download returned something other than the export "
+                              f"(Content-Type: {response.headers.get('Content-Type', 'none')}).")
+                    return None
+                with open(dest, 'wb') as f:
+                    f.write(first_chunk)
+                    for chunk in chunks:
+                        f.write(chunk)
+        except (requests.RequestException, OSError) as e:
+            log.debug(f"Direct CSV download failed: {e}")
+            dest.unlink(missing_ok=True)
+            return None
+        log.info(f"Downloaded workout list over HTTP: {dest.name}")
+        return dest
+
+    def _build_http_session(self) -> Optional[requests.Session]:
+        """
+        Creates a requests session that reuses the logged-in browser's cookies and user agent,
+        so export URLs can be fetched directly without a page load per file.
+        """
+        driver = self.browser
+        if not driver:
+            return None
+        session = requests.Session()
+        try:
+            for cookie in driver.get_cookies():
+                session.cookies.set(cookie['name'], cookie['value'],
+                                    domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+            session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent")
+        except Exception as e:
+            log.warning(f"Could not copy the browser session for direct downloads: {e}")
+            return None
+        return session
+
+    @staticmethod
+    def _fetch_tcx(session: requests.Session, url: str, dest: Path) -> bool:
+        """Downloads one TCX export to 'dest'. Anything that is not a TCX document counts as a failure."""
+        try:
+            response = session.get(url, timeout=DOWNLOAD_TIMEOUT_SEC)
+        except requests.RequestException as e:
+            log.debug(f"Direct download failed for {url}: {e}")
+            return False
+        # A login page or bot challenge comes back as HTML with a 200 status
+        if response.status_code != 200 or b'TrainingCenterDatabase' not in response.content[:1024]:
+            return False
+        try:
+            dest.write_bytes(response.content)
+        except OSError as e:
+            # Disk full, a locked file or a permissions problem: leave this one to the browser download
+            log.debug(f"Could not save direct download to '{dest.name}': {e}")
+            dest.unlink(missing_ok=True)
+            return False
+        return True
+
+    def prefetch_tcx_files(self, workout_ids: Iterable[str]) -> int:
+        """
+        Downloads TCX exports for 'workout_ids' concurrently over HTTP using the browser's cookies.
+        Files that arrive are handed out by download_tcx_file; any that fail fall back to the
+        browser download there. Returns the number of files fetched.
+        """
+        pending = [w_id for w_id in workout_ids if w_id not in self._prefetched]
+        if not pending or not self._ensure_login_and_browser():
+            return 0
+        t_dir = self.temp_download_dir
+        session = self._build_http_session()
+        if not t_dir or session is None:
+            return 0
+
+        tcx_export_url_template = self._config.get('urls', 'tcx_export_url_template')
+        log.info(f"--- Prefetching {len(pending)} TCX files ({self.download_workers} parallel downloads) ---")
+
+        def fetch(w_id: str) -> Optional[Path]:
+            dest = t_dir / f"prefetch_{w_id}.tcx"
+            return dest if self._fetch_tcx(session, tcx_export_url_template.format(workout_id=w_id), dest) else None
+
+        with session, ThreadPoolExecutor(max_workers=max(1, self.download_workers)) as pool:
+            for w_id, path in zip(pending, pool.map(fetch, pending)):
+                if path:
+                    self._prefetched[w_id] = path
+
+        fetched = sum(1 for w_id in pending if w_id in self._prefetched)
+        if fetched < len(pending):
+            log.warning(f"  - {len(pending) - fetched} TCX files will be downloaded through the browser instead.")
+        log.info(f"Prefetched {fetched}/{len(pending)} TCX files.")
+        return fetched
+
     def download_tcx_file(self, workout_id: str) -> Optional[Path]:
+        prefetched = self._prefetched.pop(workout_id, None)
+        if prefetched and prefetched.exists():
+            return prefetched
         if not self._ensure_login_and_browser(): return None
         tcx_export_url_template = self._config.get('urls', 'tcx_export_url_template')
         download_url = tcx_export_url_template.format(workout_id=workout_id)
@@ -1,129 +1,213 @@
 # C:/Users/krant/PycharmProjects/SelMapExtract/geospatial_utils.py
 
+import json
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-import geopandas as gpd
+import numpy as np
 # noinspection PyPep8Naming
 import lxml.etree as ET
+from pyproj import CRS, Transformer
+from pyproj.aoi import AreaOfInterest
+from pyproj.database import query_utm_crs_info
 from shapely.geometry import LineString
 
+try:
+    import orjson
+except ImportError:  # Optional: without orjson, GeoJSON is written with the stdlib json module
+    orjson = None
+
 log = logging.getLogger(__name__)
 
 
-def parse_tcx_for_coords(tcx_file: str) -> List[Tuple[float, float]]:
-    """
-    Parses a TCX file and extracts a list of (longitude, latitude) coordinates.
-    This version uses a robust method to handle XML namespaces correctly.
-    """
-    try:
-        with open(tcx_file, 'rb') as f:
-            parser = ET.XMLParser(remove_blank_text=True)
-            tree = ET.parse(f, parser)
-        root = tree.getroot()
-    except Exception as e:
-        log.error(f"Failed at initial parsing stage for {Path(tcx_file).name}. Reason: {e}")
-        return []
+# Qualified names are built once here rather than formatted per lookup.
+# Each tag tuple and XPath also matches the bare (namespace-less) element names.
+_TCX_NS_URI = 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2'
+_TCX_NS = f'{{{_TCX_NS_URI}}}'
+_TAG_TRACKPOINT = _TCX_NS + 'Trackpoint'
+_TRACKPOINT_TAGS = (_TAG_TRACKPOINT, 'Trackpoint')
+# TCX files have no IDs, entities, comments or meaningful whitespace worth building nodes for
+_TCX_PARSE_OPTIONS: Dict[str, Any] = dict(remove_blank_text=True, remove_comments=True, remove_pis=True,
+                                          resolve_entities=False, collect_ids=False, no_network=True)
 
-    # --- Namespace Handling ---
-    ns = root.nsmap
-    if None in ns:
-        ns['default'] = ns.pop(None)
+# Compiled once at import so lxml does not re-parse the expressions per file.
+# smart_strings=False returns plain str: lxml's default "smart" results keep a reference to their
+# parent element, which would keep every trackpoint alive after it has been cleared.
+_TCX_NAMESPACES = {'tcx': _TCX_NS_URI}
+_XP_LATITUDE = ET.XPath('tcx:Position/tcx:LatitudeDegrees/text() | Position/LatitudeDegrees/text()',
+                        namespaces=_TCX_NAMESPACES, smart_strings=False)
+_XP_LONGITUDE = ET.XPath('tcx:Position/tcx:LongitudeDegrees/text() | Position/LongitudeDegrees/text()',
+                         namespaces=_TCX_NAMESPACES, smart_strings=False)
 
-    # --- Find Trackpoints ---
+
+# Tracks with fewer points than this are written without projecting or simplifying
+SIMPLIFY_POINT_FLOOR = 20
+_METRES_PER_DEGREE = 111_320.0
+# Decimal places kept in written GeoJSON coordinates
+GEOJSON_DECIMALS = 6
+
+
+def parse_tcx_for_coords(tcx_file: str) -> np.ndarray:
+    """
+    Parses a TCX file and extracts an (N, 2) float64 array of (longitude, latitude) coordinates.
+    The array is a transposed view of contiguous longitude/latitude rows, so each column can be
+    reprojected in place.
+    Streams the file one <Trackpoint> at a time and discards each one once read,
+    so memory use stays flat regardless of the track length.
+    """
+    lat_texts: List[str] = []
+    lon_texts: List[str] = []
+    trackpoint_count = 0
     try:
-        trackpoints = root.findall('.//default:Trackpoint', namespaces=ns)
-        if not trackpoints:
-            trackpoints = root.findall('.//Trackpoint')  # Fallback
+        context = ET.iterparse(tcx_file, events=('end',), tag=_TRACKPOINT_TAGS, **_TCX_PARSE_OPTIONS)
+        for _, trackpoint in context:
+            trackpoint_count += 1
+            lat_text = _XP_LATITUDE(trackpoint)
+            lon_text = _XP_LONGITUDE(trackpoint)
+            if lat_text and lon_text:
+                lat_texts.append(lat_text[0])
+                lon_texts.append(lon_text[0])
+            trackpoint.clear(keep_tail=True)
+            while trackpoint.getprevious() is not None:
+                del trackpoint.getparent()[0]
     except Exception as e:
-        log.error(f"Failed during findall operation for trackpoints. Reason: {e}")
-        return []
+        log.error(f"Failed while parsing trackpoints in {Path(tcx_file).name}. Reason: {e}")
+        return np.empty((0, 2))
 
-    if not trackpoints:
+    if not trackpoint_count:
         log.warning(f"No <Trackpoint> elements found in {Path(tcx_file).name}. "
                     f"The file may be empty or structured unexpectedly.")
-        return []
-
-    # --- Extract Coordinates ---
-    coordinates = []
-    for i, trackpoint in enumerate(trackpoints):
-        position = trackpoint.find('default:Position', namespaces=ns)
-        if position is None:
-            position = trackpoint.find('Position')  # Fallback
-
-        if position is not None:
-            lat_el = position.find('default:LatitudeDegrees', namespaces=ns)
-            if lat_el is None:
-                lat_el = position.find('LatitudeDegrees')  # Fallback
-
-            lon_el = position.find('default:LongitudeDegrees', namespaces=ns)
-            if lon_el is None:
-                lon_el = position.find('LongitudeDegrees')  # Fallback
-
-            if lat_el is not None and lon_el is not None and lat_el.text is not None and lon_el.text is not None:
-                try:
-                    lat = float(lat_el.text)
-                    lon = float(lon_el.text)
-                    coordinates.append((lon, lat))
-                except (ValueError, TypeError):
-                    log.warning(f"Skipping malformed coordinate text in trackpoint {i} in {Path(tcx_file).name}")
-
-    log.info(f"Extracted {len(coordinates)} coordinates from {len(trackpoints)} trackpoints in {Path(tcx_file).name}.")
+        return np.empty((0, 2))
+
+    # --- Convert Coordinates ---
+    # The raw text was collected above; convert it straight into the (lon, lat) columns in one step
+    columns = np.empty((2, len(lat_texts)))
+    try:
+        columns[0] = np.asarray(lon_texts, dtype=np.float64)
+        columns[1] = np.asarray(lat_texts, dtype=np.float64)
+        coordinates = columns.T
+    except ValueError:
+        # At least one value is malformed; fall back to converting point by point
+        points: List[Tuple[float, float]] = []
+        for i, (lat_text, lon_text) in enumerate(zip(lat_texts, lon_texts)):
+            try:
+                points.append((float(lon_text), float(lat_text)))
+            except ValueError:
+                log.warning(f"Skipping malformed coordinate text at position {i} in {Path(tcx_file).name}")
+        coordinates = np.asfortranarray(np.array(points, dtype=np.float64).reshape(-1, 2))
+
+    log.info(f"Extracted {len(coordinates)} coordinates from {trackpoint_count} trackpoints in {Path(tcx_file).name}.")
     return coordinates
 
 
+def _estimate_utm_epsg(coordinates: np.ndarray) -> Optional[str]:
+    """
+    Picks the UTM zone containing the centre of the track's bounding box, as GeoDataFrame.estimate_utm_crs does.
+    """
+    min_lon, min_lat = coordinates.min(axis=0)
+    max_lon, max_lat = coordinates.max(axis=0)
+    x_center = float((min_lon + max_lon) / 2)
+    y_center = float((min_lat + max_lat) / 2)
+    utm_crs_list = query_utm_crs_info(
+        datum_name="WGS 84",
+        area_of_interest=AreaOfInterest(west_lon_degree=x_center, south_lat_degree=y_center,
+                                        east_lon_degree=x_center, north_lat_degree=y_center)
+    )
+    return utm_crs_list[0].code if utm_crs_list else None
+
+
+@lru_cache(maxsize=None)
+def _utm_transformers(epsg_code: str) -> Tuple[Transformer, Transformer]:
+    """Forward and inverse WGS84 <-> UTM transformers, built once per zone."""
+    utm_crs = CRS.from_epsg(int(epsg_code))
+    return (Transformer.from_crs("EPSG:4326", utm_crs, always_xy=True),
+            Transformer.from_crs(utm_crs, "EPSG:4326", always_xy=True))
+
+
+def _approx_extent_m(coordinates: np.ndarray) -> float:
+    """Bounding-box diagonal in metres, using an equirectangular approximation (fine at track scale)."""
+    min_lon, min_lat = coordinates.min(axis=0)
+    max_lon, max_lat = coordinates.max(axis=0)
+    mean_lat = np.radians((min_lat + max_lat) / 2)
+    dx = (max_lon - min_lon) * _METRES_PER_DEGREE * np.cos(mean_lat)
+    dy = (max_lat - min_lat) * _METRES_PER_DEGREE
+    return float(np.hypot(dx, dy))
+
+
+def _write_line_geojson(coordinates: np.ndarray, tcx_path: Path, geojson_path: Path) -> bool:
+    """
+    Writes (lon, lat) coordinates as a compact single-LineString GeoJSON FeatureCollection.
+    Coordinates are rounded to GEOJSON_DECIMALS places (about 10 cm), well below the simplification tolerance.
+    """
+    coordinates = np.round(coordinates, GEOJSON_DECIMALS)
+    if orjson is not None:
+        # orjson serialises the (contiguous) array itself, without a Python float per coordinate
+        geometry_coords = np.ascontiguousarray(coordinates)
+    else:
+        geometry_coords = coordinates.tolist()
+    feature_collection = {
+        "type": "FeatureCollection",
+        "name": geojson_path.stem,
+        "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}},
+        "features": [{
+            "type": "Feature",
+            "properties": {},
+            "geometry": {"type": "LineString", "coordinates": geometry_coords}
+        }]
+    }
+    if orjson is not None:
+        geojson_path.write_bytes(orjson.dumps(feature_collection, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(geojson_path, 'w', encoding='utf-8') as f:
+            json.dump(feature_collection, f, separators=(',', ':'))
+    log.info(f"Simplified '{tcx_path.name}' -> '{geojson_path.name}'")
+    return True
+
+
 def create_simplified_geojson(
         tcx_path: Path,
         geojson_path: Path,
         tolerance: float = 10.0
-):
+) -> bool:
     """
-    Creates a simplified GeoJSON file from a TCX file using GeoPandas.
+    Creates a simplified GeoJSON file from a TCX file. Returns True if the file was written.
+    The track is projected to its UTM zone with pyproj so 'tolerance' is in metres,
+    simplified with shapely, and projected back to WGS84.
     """
     try:
         coordinates = parse_tcx_for_coords(str(tcx_path))
         if len(coordinates) < 2:
             log.warning(f"Skipping {tcx_path.name}: not enough points ({len(coordinates)}) to form a line.")
-            return
+            return False
 
-        line = LineString(coordinates)
-        gdf = gpd.GeoDataFrame(geometry=[line], crs="EPSG:4326")
+        # Short tracks gain nothing from simplification; write them as they are
+        if len(coordinates) < SIMPLIFY_POINT_FLOOR:
+            return _write_line_geojson(coordinates, tcx_path, geojson_path)
 
-        # Simplify geometry
-        utm_crs = gdf.estimate_utm_crs(datum_name="WGS 84")
+        # A track whose whole extent is within the tolerance simplifies to its endpoints
+        if _approx_extent_m(coordinates) < tolerance and not np.array_equal(coordinates[0], coordinates[-1]):
+            return _write_line_geojson(coordinates[[0, -1]], tcx_path, geojson_path)
 
-        # Type Guard: Ensure utm_crs is not None before projecting
-        if utm_crs is None:
+        utm_epsg = _estimate_utm_epsg(coordinates)
+        if utm_epsg is None:
             log.error(f"Could not estimate suitable UTM projection for {tcx_path.name}. Skipping simplification.")
-            return
-
-        # Fix: Convert the CRS object to WKT string to satisfy strict IDE type checking
-        # This resolves the 'got CRS | None instead' error at the projection call
-        utm_wkt = utm_crs.to_wkt()
-        gdf_projected = gdf.to_crs(utm_wkt)
-
-        # Explicit check to satisfy IDE type checker regarding GeoDataFrame status
-        if gdf_projected is not None and not gdf_projected.empty:
-            gdf_projected['geometry'] = gdf_projected.geometry.simplify(
-                tolerance=tolerance, preserve_topology=True
-            )
-
-            # Reproject back to original CRS (WGS84)
-            # We know gdf.crs is not None here because we initialized it above
-            original_crs = gdf.crs
-            if original_crs is not None:
-                gdf_simplified = gdf_projected.to_crs(original_crs)
-
-                # Type Guard: verify gdf_simplified exists and has data
-                if gdf_simplified is not None and not gdf_simplified.empty:
-                    if not gdf_simplified.geometry.is_empty.all():
-                        gdf_simplified.to_file(str(geojson_path), driver='GeoJSON')
-                        log.info(f"Simplified '{tcx_path.name}' -> '{geojson_path.name}'")
-                    else:
-                        log.warning(f"Geometry for {tcx_path.name} became empty after simplification.")
-                else:
-                    log.warning(f"Simplification resulted in an empty dataset for {tcx_path.name}.")
+            return False
+        to_utm, to_wgs84 = _utm_transformers(utm_epsg)
+
+        # Project the coordinate columns in place, simplify, then project the kept points back in place.
+        # The columns are contiguous, so pyproj writes into them instead of allocating new arrays.
+        to_utm.transform(coordinates[:, 0], coordinates[:, 1], inplace=True)
+        simplified = LineString(coordinates).simplify(tolerance, preserve_topology=True)
+        if simplified.is_empty:
+            log.warning(f"Geometry for {tcx_path.name} became empty after simplification.")
+            return False
+
+        kept = np.array(simplified.coords).T.copy()
+        to_wgs84.transform(kept[0], kept[1], inplace=True)
+        return _write_line_geojson(kept.T, tcx_path, geojson_path)
 
     except Exception as e:
         log.error(f"ERROR simplifying '{tcx_path.name}': {e}", exc_info=True)
+        return False
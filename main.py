@@ -48,11 +48,10 @@ class GUIHandler(logging.Handler):
             self.handleError(record)
 
 
-def _handle_new_workout(row: Dict, repo: WorkoutRepository, client: Optional[MapMyRideClient]):
+def _handle_new_workout(new_workout: Workout, repo: WorkoutRepository, client: Optional[MapMyRideClient]):
     """Helper to process a workout not found in the local repository."""
-    w_id = Workout(row).workout_id
-    log.info(f"  - NEW: Workout ID {w_id} ({row.get('Activity Type')})")
-    new_workout = Workout(row)
+    w_id = new_workout.workout_id
+    log.info(f"  - NEW: Workout ID {w_id} ({new_workout.activity_type})")
 
     is_hike_or_walk = any(t in new_workout.activity_type.lower() for t in ['hike', 'walk'])
 
@@ -85,7 +84,11 @@ def _handle_existing_workout(existing_workout: Workout, row: Dict, repo: Workout
 
     is_managed = file_status.get('is_standard', False)
     current_path = existing_workout.tcx_path
-    file_missing = current_path is None or not current_path.exists()
+    # A path taken from this run's folder scan is known to exist; only stat paths carried over from the CSV
+    if file_status.get('path'):
+        file_missing = False
+    else:
+        file_missing = current_path is None or not current_path.exists()
     is_hike_or_walk = any(t in existing_workout.activity_type.lower() for t in ['hike', 'walk'])
 
     repaired = False
@@ -120,18 +123,33 @@ def _process_and_merge_workouts(online_data: List[Dict],
     new_count = 0
     repair_count = 0
 
+    # Resolve each row's ID once and split new from known workouts with a single set difference.
+    # The Workout built here (and its parsed ID) is kept and reused if the row turns out to be new.
+    candidates = []
     for row in online_data:
         temp_workout = Workout(row)
-        if not temp_workout.workout_id or temp_workout.is_empty:
-            continue
-
-        existing_workout = repo.get_by_id(temp_workout.workout_id)
-
-        if existing_workout is None:
-            _handle_new_workout(row, repo, client)
+        if temp_workout.workout_id and not temp_workout.is_empty:
+            candidates.append((temp_workout.workout_id, row, temp_workout))
+    new_ids = {w_id for w_id, _, _ in candidates}.difference(repo.workouts)
+
+    # Quick sync trusts existing records, so only the new rows need visiting
+    if not full_check:
+        candidates = [c for c in candidates if c[0] in new_ids]
+
+    # New workouts always need their TCX file, so fetch those in parallel before the sequential pass
+    if client and new_ids:
+        client.prefetch_tcx_files(sorted(new_ids))
+
+    for w_id, row, row_workout in candidates:
+        if w_id in new_ids:
+            # Later rows with the same ID are treated as existing, as before
+            new_ids.discard(w_id)
+            _handle_new_workout(row_workout, repo, client)
             new_count += 1
         elif full_check:
-            if _handle_existing_workout(existing_workout, row, repo, existing_files_map, client):
+            existing_workout = repo.get_by_id(w_id)
+            if existing_workout is not None and _handle_existing_workout(existing_workout, row, repo,
+                                                                          existing_files_map, client):
                 repair_count += 1
 
     log.info(f"--- Sync Summary: {new_count} New, {repair_count} Repaired ---")
@@ -146,8 +164,9 @@ def repair_workout_names(config: configparser.ConfigParser,
     repo.load()
 
     existing_files_map = repo.scan_and_build_id_map()
-    for w in repo.get_all():
-        f_info = existing_files_map.get(w.workout_id)
+    # The repository is keyed by workout ID, so each workout costs one map probe and no Link re-read
+    for w_id, w in repo.workouts.items():
+        f_info = existing_files_map.get(w_id)
         if f_info:
             w.tcx_path = f_info['path']
             if f_info['title'] and not w.workout_name:
@@ -155,7 +174,8 @@ def repair_workout_names(config: configparser.ConfigParser,
 
     if workout_ids:
         to_repair: List[Workout] = []
-        for wid in workout_ids:
+        # dict.fromkeys drops repeated IDs in O(n) while keeping the requested order
+        for wid in dict.fromkeys(workout_ids):
             found_w = repo.get_by_id(wid)
             if found_w:
                 to_repair.append(found_w)
@@ -214,7 +234,23 @@ def repair_workout_names(config: configparser.ConfigParser,
             client.__exit__(None, None, None)
 
 
-def sync_workouts(config, use_local_csv=False, full_check=False):
+def _read_online_csv(csv_path) -> List[Dict]:
+    """
+    Reads the exported workout list with csv.reader. Rows without a 'Link' can never
+    yield a workout ID, so they are dropped before a dict is built for them.
+    """
+    with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if 'Link' not in header:
+            log.warning(f"No 'Link' column in '{Path(csv_path).name}'; no workouts to sync.")
+            return []
+        link_idx = header.index('Link')
+        return [dict(zip(header, row)) for row in reader if len(row) > link_idx and row[link_idx]]
+
+
+def sync_workouts(config, use_local_csv=False, full_check=False) -> WorkoutRepository:
+    """Syncs the master list with MapMyRide. Returns the repository so later steps can reuse it."""
     repo = WorkoutRepository(config)
     repo.load()
     existing_files_map = repo.scan_and_build_id_map()
@@ -224,14 +260,12 @@ def sync_workouts(config, use_local_csv=False, full_check=False):
     try:
         if use_local_csv:
             log.info("Using local CSV for synchronization.")
-            with open(config.get('debugging', 'local_csv_path'), 'r', encoding='utf-8-sig') as f:
-                online_data = list(csv.DictReader(f))
+            online_data = _read_online_csv(config.get('debugging', 'local_csv_path'))
         else:
             client = MapMyRideClient(config)
             online_data_path = client.download_workout_list_csv()
             if online_data_path:
-                with open(online_data_path, 'r', encoding='utf-8-sig') as f:
-                    online_data = list(csv.DictReader(f))
+                online_data = _read_online_csv(online_data_path)
 
         if online_data:
             _process_and_merge_workouts(online_data, repo, existing_files_map, client, full_check)
@@ -240,20 +274,25 @@ def sync_workouts(config, use_local_csv=False, full_check=False):
     finally:
         if client:
             client.__exit__(None, None, None)
+    return repo
 
 
-def simplify_only(config: configparser.ConfigParser):
+def simplify_only(config: configparser.ConfigParser, repo: Optional[WorkoutRepository] = None):
+    """
+    Updates the simplified GeoJSON tracks. Pass the repository returned by sync_workouts
+    to reuse it instead of re-reading the master CSV that was just written.
+    """
     log.info("--- STEP 2: UPDATING SIMPLIFIED TRACKS FOR GPXSEE ---")
-    repo = WorkoutRepository(config)
-    repo.load()
+    if repo is None:
+        repo = WorkoutRepository(config)
+        repo.load()
     existing_files_map = repo.scan_and_build_id_map()
     all_workouts = repo.get_all()
 
-    for w in all_workouts:
-        if w.workout_id in existing_files_map:
-            info = existing_files_map[w.workout_id]
-            if info['title'] and not w.workout_name:
-                w.temp_proper_name = info['title']
+    for w_id, w in repo.workouts.items():
+        info = existing_files_map.get(w_id)
+        if info and info['title'] and not w.workout_name:
+            w.temp_proper_name = info['title']
 
     if not all_workouts:
         log.warning("  ! No workouts found to process.")
@@ -340,14 +379,14 @@ def main():
 
             try:
                 if event == '-QUICK-':
-                    sync_workouts(config=app_config, use_local_csv=False, full_check=False)
-                    simplify_only(config=app_config)
+                    repo = sync_workouts(config=app_config, use_local_csv=False, full_check=False)
+                    simplify_only(config=app_config, repo=repo)
                 elif event == '-FULL-':
-                    sync_workouts(config=app_config, use_local_csv=False, full_check=True)
-                    simplify_only(config=app_config)
+                    repo = sync_workouts(config=app_config, use_local_csv=False, full_check=True)
+                    simplify_only(config=app_config, repo=repo)
                 elif event == '-LOCAL-':
-                    sync_workouts(config=app_config, use_local_csv=True, full_check=False)
-                    simplify_only(config=app_config)
+                    repo = sync_workouts(config=app_config, use_local_csv=True, full_check=False)
+                    simplify_only(config=app_config, repo=repo)
                 elif event == '-MAPS-':
                     generate_maps(config=app_config)
             # noinspection PyBroadException
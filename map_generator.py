@@ -2,20 +2,65 @@
 
 import configparser
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Set  # Added Optional and Set
-
-import folium
+from typing import List, Optional, Set, Tuple  # Added Optional and Set
 
 # Import the new Workout class, as this generator will operate on Workout objects
 from workout import Workout
-# Import the refactored geospatial helper function
-from geospatial_utils import create_simplified_geojson
+
+# folium (which pulls in pandas) and the geospatial stack are imported where they are used,
+# so starting the app or running a sync does not pay for them.
 
 # It's best practice to get the logger at the module level
 log = logging.getLogger(__name__)
 
 
+class _WorkerLogCollector(logging.Handler):
+    """Keeps the warnings and errors (with any traceback) a worker logs while simplifying one file."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(self.format(record))
+
+
+# Set only inside pool workers; inline runs log straight to the parent's handlers
+_worker_log_collector: Optional[_WorkerLogCollector] = None
+
+
+def _init_simplify_worker():
+    """
+    Handlers inherited from the parent (such as the GUI window) must not be driven from another
+    process, so worker processes collect their warnings and errors for the parent to log instead.
+    """
+    global _worker_log_collector
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    _worker_log_collector = _WorkerLogCollector()
+    root_logger.addHandler(_worker_log_collector)
+
+
+def _simplify_one(task: Tuple[Path, Path, float]) -> Tuple[str, bool, Optional[str]]:
+    """
+    Top-level (picklable) wrapper around create_simplified_geojson for the process pool.
+    Returns the file name, whether it was written, and (in a worker) the reason it was not.
+    """
+    from geospatial_utils import create_simplified_geojson
+
+    tcx_path, dest_path, tolerance = task
+    if _worker_log_collector is not None:
+        _worker_log_collector.messages.clear()
+    ok = create_simplified_geojson(tcx_path=tcx_path, geojson_path=dest_path, tolerance=tolerance)
+    error_message = None
+    if not ok and _worker_log_collector is not None and _worker_log_collector.messages:
+        error_message = '\n'.join(_worker_log_collector.messages)
+    return tcx_path.name, ok, error_message
+
+
 # --- The main MapGenerator class ---
 
 class MapGenerator:
@@ -45,29 +90,58 @@ class MapGenerator:
         workouts_to_process = [w for w in workouts if not workout_types or w.activity_type.lower() in workout_types]
         log.info(f"Found {len(workouts_to_process)} workouts of specified types to process for simplification.")
 
+        # One listing of the output folder replaces an exists() stat per workout in incremental mode
+        existing_outputs: Set[str] = set()
+        if only_if_missing:
+            with os.scandir(self.simplified_folder) as entries:
+                existing_outputs = {os.path.normcase(e.name) for e in entries}
+
+        tasks: List[Tuple[Path, Path, float]] = []
         for workout in workouts_to_process:
             if not workout.tcx_path:
                 continue
 
             dest_path = self.simplified_folder / (workout.tcx_path.stem + '.geojson')
 
-            if not only_if_missing or not dest_path.exists():
+            if not only_if_missing or os.path.normcase(dest_path.name) not in existing_outputs:
                 if workout.tcx_path.exists():
-                    # Call the refactored helper function
-                    create_simplified_geojson(
-                        tcx_path=workout.tcx_path,
-                        geojson_path=dest_path,
-                        tolerance=10.0
-                    )
+                    tasks.append((workout.tcx_path, dest_path, 10.0))
                 else:
                     log.warning(f"Source file not found, cannot simplify: {workout.tcx_path}")
 
+        if not tasks:
+            return
+
+        # Each file is independent and CPU-bound (XML parse + simplification), so spread them over processes.
+        # With a single file or a single core the work is done inline to avoid the pool start-up cost.
+        workers = min(len(tasks), os.cpu_count() or 1)
+        if workers == 1:
+            results = [_simplify_one(task) for task in tasks]
+        else:
+            log.info(f"  > Simplifying {len(tasks)} files across {workers} processes...")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_simplify_worker) as pool:
+                results = list(pool.map(_simplify_one, tasks, chunksize=max(1, min(8, len(tasks) // workers))))
+
+        created_count = sum(1 for _, ok, _ in results if ok)
+        for name, ok, error_message in results:
+            if not ok:
+                if error_message:
+                    log.warning(f"Could not simplify '{name}': {error_message}")
+                else:
+                    log.warning(f"Could not simplify '{name}'.")
+        log.info(f"Simplified {created_count}/{len(tasks)} files.")
+
     def create_route_map(self):
         """
         Creates an HTML map visualizing all simplified GeoJSON routes.
         """
+        import folium
+
         log.info("--- Creating HTML Route Map ---")
-        geojson_files = list(self.simplified_folder.glob("*.geojson"))
+        # A single scandir pass; the entries' names and paths are used directly, without Path objects or glob matching
+        with os.scandir(self.simplified_folder) as entries:
+            geojson_files = [e for e in entries
+                             if os.path.normcase(e.name).endswith('.geojson') and e.is_file(follow_symlinks=False)]
         if not geojson_files:
             log.warning("No GeoJSON files found to map. Please run simplification first.")
             return
@@ -81,14 +155,14 @@ class MapGenerator:
         for geojson_file in geojson_files:
             try:
                 # Use the stem as the label/popup
-                popup_text = geojson_file.stem
+                popup_text = os.path.splitext(geojson_file.name)[0]
 
                 # Fix: Use GeoJsonPopup instead of Popup for GeoJson objects
                 # This resolves the 'Expected type GeoJsonPopup | None' error
                 gj_popup = folium.GeoJsonPopup(fields=[], labels=False, sticky=True)
 
                 folium.GeoJson(
-                    str(geojson_file),
+                    geojson_file.path,
                     style_function=lambda x: {'color': 'blue', 'weight': 2.5, 'opacity': 0.7},
                     # We can use a tooltip for simpler stem display or
                     # use the popup properly if the GeoJSON had properties
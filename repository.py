@@ -2,19 +2,30 @@
 
 import configparser
 import csv
+import os
 import shutil
 import re
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any
+from typing import Any, Dict, List, Optional, Set
 
-from workout import Workout
+from workout import Workout, csv_columns
 
 log = logging.getLogger(__name__)
 
+# Filename patterns, compiled once since they run against every TCX file on each scan
+_WORKOUT_ID_RE = re.compile(r'\(W(\d+)\)')
+_STANDARD_STEM_RE = re.compile(r'^\d{4} \d{2} \d{2}.*?\(W\d+\)$')
+_TITLE_RE = re.compile(r'^\d{4} \d{2} \d{2}\s*(.*?)\s*\d+\.\d+km')
 
-def _extract_metadata_from_filename(path: Path) -> Dict[str, Any]:
+# Columns that lead the master CSV, in this order; any others follow in first-seen order
+_PREFERRED_COLUMN_ORDER = ('Date Submitted', 'Workout Date', 'Activity Type', 'Link', 'Filename', 'Fingerprint',
+                           'Notes', 'Distance (km)', 'Workout Time (seconds)')
+_PREFERRED_COLUMNS = frozenset(_PREFERRED_COLUMN_ORDER)
+
+
+def _extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
     """
     Parses a filename to extract ID, Title, and check format compliance.
     Pattern: YYYY MM DD [Title] [Distance]km [Activity] (W[ID]).tcx
@@ -23,21 +34,21 @@ def _extract_metadata_from_filename(path: Path) -> Dict[str, Any]:
     # This prevents the IDE from incorrectly inferring that values must be Booleans.
     metadata: Dict[str, Any] = {'id': None, 'title': None, 'is_standard': False}
 
-    id_match = re.search(r'\(W(\d+)\)', path.name)
+    id_match = _WORKOUT_ID_RE.search(filename)
     if not id_match:
         return metadata
 
     # The assignment of a string here will now be accepted by the linter
     metadata['id'] = id_match.group(1)
-    stem = path.stem
+    stem = os.path.splitext(filename)[0]
 
     # 1. Check if the file matches the standard prefix/suffix pattern
-    if re.match(r'^\d{4} \d{2} \d{2}.*?\(W\d+\)$', stem):
+    if _STANDARD_STEM_RE.match(stem):
         metadata['is_standard'] = True
 
     # 2. Extract Title (text between Date and Distance)
     # This regex is resilient to varying amounts of whitespace
-    title_match = re.search(r'^\d{4} \d{2} \d{2}\s*(.*?)\s*\d+\.\d+km', stem)
+    title_match = _TITLE_RE.search(stem)
     if title_match:
         found_title = title_match.group(1).strip()
         if found_title:
@@ -46,12 +57,37 @@ def _extract_metadata_from_filename(path: Path) -> Dict[str, Any]:
     return metadata
 
 
-def _get_unique_filepath(directory: Path, filename: str) -> Path:
+def _scan_tcx_files(directory: Path) -> List[os.DirEntry]:
+    """
+    Lists the *.tcx files in 'directory' with a single os.scandir pass.
+    DirEntry reuses the type information from the directory listing, so no extra stat is issued.
+    """
+    with os.scandir(directory) as entries:
+        return [e for e in entries
+                if os.path.normcase(e.name).endswith('.tcx') and e.is_file(follow_symlinks=False)]
+
+
+def _get_unique_filepath(directory: Path, filename: str, existing_names: Optional[Set[str]] = None) -> Path:
+    """
+    Returns a path in 'directory' that does not collide with an existing file.
+    When 'existing_names' (a snapshot of os.path.normcase'd names) is given, collisions are
+    checked in memory instead of with one stat per attempt, and the chosen name is added to it.
+    """
     filepath = directory / filename
-    if not filepath.exists():
-        return filepath
     stem = filepath.stem
     suffix = filepath.suffix
+
+    if existing_names is not None:
+        candidate = filename
+        counter = 1
+        while os.path.normcase(candidate) in existing_names:
+            candidate = f"{stem}_{counter:04d}{suffix}"
+            counter += 1
+        existing_names.add(os.path.normcase(candidate))
+        return directory / candidate
+
+    if not filepath.exists():
+        return filepath
     counter = 1
     while filepath.exists():
         filepath = directory / f"{stem}_{counter:04d}{suffix}"
@@ -66,15 +102,28 @@ class WorkoutRepository:
         self.local_csv_path = Path(config.get('debugging', 'local_csv_path'))
         self.source_folder.mkdir(parents=True, exist_ok=True)
         self.workouts: Dict[str, Workout] = {}
+        # Normcase'd names of the TCX files in source_folder, used for in-memory collision checks
+        self._tcx_names: Optional[Set[str]] = None
+        # Running union of CSV column names in first-seen order, kept up to date as workouts are loaded or added
+        self._columns: Dict[str, None] = {}
 
     def load(self):
         log.info(f"--- Loading Master Workout List from '{self.master_csv_path.name}' ---")
         if not self.master_csv_path.exists():
             return
         with open(self.master_csv_path, 'r', newline='', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if 'Link' not in header:
+                log.warning(f"No 'Link' column in '{self.master_csv_path.name}'; nothing loaded.")
+                return
+            # Positional access: only rows with a link are turned into dicts
+            link_idx = header.index('Link')
+            self._columns.update(csv_columns(header))
             for row in reader:
-                workout = Workout(row)
+                if len(row) <= link_idx or not row[link_idx]:
+                    continue
+                workout = Workout(dict(zip(header, row)))
                 if workout.workout_id:
                     self.workouts[workout.workout_id] = workout
         log.info(f"Loaded {len(self.workouts)} existing workouts from the master list.")
@@ -87,27 +136,32 @@ class WorkoutRepository:
 
     def add_or_update(self, workout: Workout):
         self.workouts[workout.workout_id] = workout
+        self._columns.update(workout.csv_keys())
 
     def save_all(self):
         log.info(f"--- Saving all {len(self.workouts)} workouts to '{self.master_csv_path.name}' ---")
         if not self.workouts:
             return
         sorted_workouts = sorted(self.get_all(), key=lambda w: w.workout_date or datetime.min, reverse=True)
-        all_rows = [w.to_csv_row() for w in sorted_workouts]
-        all_keys: Set[str] = set()
-        for row in all_rows:
-            all_keys.update(row.keys())
-
-        preferred_order = ['Date Submitted', 'Workout Date', 'Activity Type', 'Link', 'Filename', 'Fingerprint',
-                           'Notes', 'Distance (km)', 'Workout Time (seconds)']
-        fieldnames = sorted(list(all_keys),
-                            key=lambda x: preferred_order.index(x) if x in preferred_order else len(preferred_order))
-
-        with open(self.master_csv_path, 'w', encoding='UTF8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_rows)
-        log.info(f"✅ Successfully wrote {len(all_rows)} records to '{self.master_csv_path.name}'.")
+        # Known columns lead in a fixed order; the rest keep the order MapMyRide first delivered them in
+        fieldnames = [k for k in _PREFERRED_COLUMN_ORDER if k in self._columns] + \
+                     [k for k in self._columns if k not in _PREFERRED_COLUMNS]
+
+        # Stream into a sibling temp file and swap it in, so a crash never leaves a half-written master list
+        temp_path = self.master_csv_path.with_name(self.master_csv_path.name + '.tmp')
+        try:
+            with open(temp_path, 'w', encoding='UTF8', newline='', buffering=1 << 20) as f:
+                writer = csv.writer(f)
+                writer.writerow(fieldnames)
+                # Rows are still produced one at a time; writerows just drives the loop from C
+                writer.writerows([row.get(k, '') for k in fieldnames]
+                                 for row in (workout.to_csv_row() for workout in sorted_workouts))
+            os.replace(temp_path, self.master_csv_path)
+        except OSError as e:
+            log.error(f"❌ Failed to write '{self.master_csv_path.name}': {e}")
+            temp_path.unlink(missing_ok=True)
+            raise
+        log.info(f"✅ Successfully wrote {len(sorted_workouts)} records to '{self.master_csv_path.name}'.")
 
     def scan_and_build_id_map(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -115,30 +169,38 @@ class WorkoutRepository:
         Returns a map of ID -> {path: Path, title: str, is_standard: bool}
         """
         log.info(f"--- Scanning folder and recovering titles from '{self.source_folder.name}' ---")
-        id_to_files: Dict[str, List[Path]] = {}
-        for tcx_path in self.source_folder.glob("*.tcx"):
-            meta = _extract_metadata_from_filename(tcx_path)
-            if meta['id']:
-                id_to_files.setdefault(meta['id'], []).append(tcx_path)
-
+        # One pass: the first file seen for an ID is recorded, and a later duplicate is resolved on the spot
+        # (the normcase-smallest path survives), so no per-ID lists are built for the usual unique case.
         authoritative_map: Dict[str, Dict[str, Any]] = {}
-        for workout_id, file_list in id_to_files.items():
-            file_list.sort()
-            file_to_keep = file_list[0]
-            if len(file_list) > 1:
-                log.info(f"  - Cleaning {len(file_list) - 1} duplicates for ID {workout_id}")
-                for file_to_delete in file_list[1:]:
-                    try:
-                        file_to_delete.unlink()
-                    except OSError:
-                        pass
-
-            meta = _extract_metadata_from_filename(file_to_keep)
+        tcx_names: Set[str] = set()
+        for entry in _scan_tcx_files(self.source_folder):
+            tcx_names.add(os.path.normcase(entry.name))
+            meta = _extract_metadata_from_filename(entry.name)
+            workout_id = meta['id']
+            if not workout_id:
+                continue
+
+            current = authoritative_map.get(workout_id)
+            if current is not None:
+                if os.path.normcase(entry.path) < os.path.normcase(str(current['path'])):
+                    file_to_delete = str(current['path'])
+                else:
+                    file_to_delete = entry.path
+                log.info(f"  - Cleaning duplicate for ID {workout_id}: {os.path.basename(file_to_delete)}")
+                try:
+                    os.unlink(file_to_delete)
+                    tcx_names.discard(os.path.normcase(os.path.basename(file_to_delete)))
+                except OSError:
+                    pass
+                if file_to_delete == entry.path:
+                    continue
+
             authoritative_map[workout_id] = {
-                'path': file_to_keep,
+                'path': Path(entry.path),
                 'title': meta['title'],
                 'is_standard': meta['is_standard']
             }
+        self._tcx_names = tcx_names
         return authoritative_map
 
     def save_tcx_file(self, temp_path: Path, workout: Workout, ignore_if_exists: bool = False) -> Optional[Path]:
@@ -147,15 +209,27 @@ class WorkoutRepository:
         target_path = self.source_folder / new_filename
 
         if ignore_if_exists:
-            if temp_path.exists() and temp_path.resolve() == target_path.resolve():
+            # Compare normalised path strings first; only a match needs the exists() stat
+            same_path = os.path.normcase(os.path.abspath(temp_path)) == os.path.normcase(os.path.abspath(target_path))
+            if same_path and temp_path.exists():
                 log.info(f"  - Filename is already correct: {new_filename}")
                 return target_path
 
-        final_tcx_path = _get_unique_filepath(self.source_folder, new_filename)
+        if self._tcx_names is None:
+            self._tcx_names = {os.path.normcase(e.name) for e in _scan_tcx_files(self.source_folder)}
+        final_tcx_path = _get_unique_filepath(self.source_folder, new_filename, self._tcx_names)
         try:
-            shutil.move(temp_path, final_tcx_path)
+            try:
+                # Same-volume moves (renames in place, downloads on the same drive) are a single atomic rename
+                os.replace(temp_path, final_tcx_path)
+            except OSError:
+                # Cross-device: shutil.move copies then deletes
+                shutil.move(temp_path, final_tcx_path)
+            if temp_path.parent == self.source_folder:
+                self._tcx_names.discard(os.path.normcase(temp_path.name))
             log.info(f"  - 💾 SAVED: Renamed and moved to '{final_tcx_path.name}'")
             return final_tcx_path
         except (OSError, shutil.Error) as e:
+            self._tcx_names.discard(os.path.normcase(final_tcx_path.name))
             log.error(f"  - ❌ FAILED: Could not move file: {e}")
             return None
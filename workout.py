@@ -3,8 +3,9 @@
 from __future__ import annotations
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Tuple
 # noinspection PyPep8Naming
 import lxml.etree as ET
 import os
@@ -19,32 +20,78 @@ ACTIVITY_KEYWORDS = [
 ]
 
 
+# Filename cleanup, built once instead of on every generate_filename_stem call.
+# The unsafe characters are a fixed set, so a str.translate deletion table does the job without the regex engine.
+_UNSAFE_FILENAME_CHARS_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=None)
+def _activity_keyword_pattern(activity_type: str) -> re.Pattern:
+    """
+    One compiled alternation of the default title keywords plus 'activity_type', so a title is
+    scanned once instead of once per keyword. Longest keywords come first so e.g. 'Walk/Hike'
+    wins over 'Walk'. Built once per activity type.
+    """
+    all_synonyms = sorted(set(ACTIVITY_KEYWORDS + [activity_type]), key=len, reverse=True)
+    alternation = '|'.join(re.escape(keyword) for keyword in all_synonyms)
+    return re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _distance_patterns(distance_km: float) -> Tuple[re.Pattern, ...]:
+    """Compiled patterns for the two ways a distance is written in default titles (e.g. '5.10km', '5.1 km')."""
+    return tuple(re.compile(dp, re.IGNORECASE) for dp in (rf'{distance_km:.2f}\s*km', rf'{distance_km:g}\s*km'))
+
+
+@lru_cache(maxsize=4096)
 def _get_workout_id_from_link(link: str) -> str:
     if not link:
         return ''
-    return link.strip('/').split('/')[-1]
+    # rpartition avoids allocating the full list of path segments
+    return link.rstrip('/').rpartition('/')[2]
+
 
+# Month lookup for the MapMyRide CSV date style, e.g. "July 20, 2025" or "Sept. 1, 2025".
+# English names are fixed here so parsing does not depend on the system locale.
+_MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                'August', 'September', 'October', 'November', 'December')
+_MONTHS: Dict[str, int] = {name.lower(): i for i, name in enumerate(_MONTH_NAMES, start=1)}
+_MONTHS.update({name[:3].lower(): i for i, name in enumerate(_MONTH_NAMES, start=1)})
+_MONTHS['sept'] = 9
 
+_CSV_DATE_RE = re.compile(r'([A-Za-z]+)\.?\s+(\d{1,2}),\s*(\d{4})')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+
+# The same date strings are parsed for the save sort and for filenames; datetimes are immutable, so sharing is safe
+@lru_cache(maxsize=8192)
 def _parse_csv_date_str(date_str: str) -> Optional[datetime]:
     if not date_str:
         return None
-    cleaned_date_str = date_str.replace('Sept.', 'Sep.').replace('.', '')
-    for fmt in ('%B %d, %Y', '%b %d, %Y', '%Y-%m-%d'):
-        try:
-            return datetime.strptime(cleaned_date_str, fmt)
-        except ValueError:
-            continue
+    date_str = date_str.strip()
+    try:
+        m = _CSV_DATE_RE.fullmatch(date_str)
+        if m:
+            month = _MONTHS.get(m.group(1).lower())
+            return datetime(int(m.group(3)), month, int(m.group(2))) if month else None
+        m = _ISO_DATE_RE.fullmatch(date_str)
+        if m:
+            return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    except ValueError:
+        # Out-of-range day or month, e.g. "Feb 30, 2025"
+        pass
     return None
 
 
 def _create_fingerprint(total_time_seconds: str, distance_m: str) -> str:
     try:
         time_sec = int(round(float(total_time_seconds or 0)))
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         time_sec = 0
     try:
         dist_cm = int(round(float(distance_m or 0) * 100))
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         dist_cm = 0
     return f"T{time_sec:08d}D{dist_cm:010d}"
 
@@ -70,6 +117,17 @@ def _extract_tcx_file_properties(tcx_filename: str) -> Dict[str, str]:
     return prop_dict
 
 
+def csv_columns(field_names: Iterable[str]) -> Dict[str, None]:
+    """
+    Master CSV columns for a record with these fields, in first-seen order:
+    'Workout Name' is never written and 'Filename' is always present.
+    """
+    columns = dict.fromkeys(field_names)
+    columns.pop('Workout Name', None)
+    columns.setdefault('Filename')
+    return columns
+
+
 class Workout:
     def __init__(self, data: Dict[str, Any]):
         """
@@ -85,6 +143,8 @@ class Workout:
             self.tcx_path = None
 
         self.temp_proper_name: Optional[str] = None
+        # Parsed from the Link on first access; reset whenever the Link may have changed
+        self._workout_id: Optional[str] = None
 
     @property
     def workout_id(self) -> str:
@@ -92,8 +152,10 @@ class Workout:
         Extracts the ID from the Link.
         Uses cast to satisfy IDE type checking for dictionary access.
         """
-        link_val = self._data.get('Link', '')
-        return _get_workout_id_from_link(str(link_val))
+        if self._workout_id is None:
+            link_val = self._data.get('Link', '')
+            self._workout_id = _get_workout_id_from_link(str(link_val))
+        return self._workout_id
 
     @property
     def workout_date(self) -> Optional[datetime]:
@@ -148,6 +210,8 @@ class Workout:
 
     def update_from_online_data(self, new_data: Dict[str, Any]):
         self._data.update(new_data)
+        if 'Link' in new_data:
+            self._workout_id = None
 
     def generate_filename_stem(self) -> str:
         """
@@ -165,22 +229,24 @@ class Workout:
         cleaned_name = raw_name
 
         if cleaned_name:
-            dist_patterns = [rf'{self.distance_km:.2f}\s*km', rf'{self.distance_km:g}\s*km']
-            for dp in dist_patterns:
-                cleaned_name = re.sub(dp, '', cleaned_name, flags=re.IGNORECASE)
-            all_synonyms = sorted(list(set(ACTIVITY_KEYWORDS + [self.activity_type])), key=len, reverse=True)
-            for keyword in all_synonyms:
-                cleaned_name = re.sub(rf'\b{re.escape(keyword)}\b', '', cleaned_name, flags=re.IGNORECASE)
-            cleaned_name = re.sub(r'[<>:"/\\|?*]', '', cleaned_name)
-            cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()
+            for pattern in _distance_patterns(self.distance_km):
+                cleaned_name = pattern.sub('', cleaned_name)
+            cleaned_name = _activity_keyword_pattern(self.activity_type).sub('', cleaned_name)
+            cleaned_name = cleaned_name.translate(_UNSAFE_FILENAME_CHARS_TABLE)
+            cleaned_name = _WHITESPACE_RE.sub(' ', cleaned_name).strip()
 
         name_part = f" {cleaned_name}" if cleaned_name else ""
         return f"{date_prefix}{name_part} {self.distance_km:.2f}km {activity_display} (W{self.workout_id})"
 
+    def csv_keys(self) -> Dict[str, None]:
+        """Column names 'to_csv_row' would produce, in the same order, without building the row."""
+        return csv_columns(self._data)
+
     def to_csv_row(self) -> Dict[str, Any]:
-        row_copy = self._data.copy()
-        row_copy['Filename'] = str(self.tcx_path) if self.tcx_path else ''
-        return {k: v for k, v in row_copy.items() if k != 'Workout Name'}
+        # One filtered build instead of a full copy followed by a second filtering copy
+        row = {k: v for k, v in self._data.items() if k != 'Workout Name'}
+        row['Filename'] = str(self.tcx_path) if self.tcx_path else ''
+        return row
 
     def __repr__(self) -> str:
         return f"<Workout ID={self.workout_id} Name='{self.workout_name}'>"